@@ -1,19 +1,26 @@
 """
 Creates a data pipeline between an FTP server and S3 instance; files on the
-server are concatenated and written to the S3 instance as Snappy-compressed
-Parquet files
+server are concatenated and written to the S3 instance as compressed Parquet
+files (Zstandard by default)
 
 :class EngineConfig:    A wrapper for the input configuration
 :class FTPETLEngine:    Performs the ETL process
 """
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import csv
 import ftplib
-import gc
+import hashlib
+import io
+import logging
 import os
 from pathlib import Path
 import re
+import threading
 
-import numpy as np
 import pandas as pd
+import pyarrow.compute as pc
+import pyarrow.csv as pv
 import pyarrow.parquet as pq
 import pyarrow as pa
 import s3fs
@@ -21,6 +28,135 @@ import s3fs
 from .logger import logger
 from .FTPWalk import FTPWalk
 
+# Derived attributes of configs that have already passed validation, keyed by
+# a digest of the config contents
+_VALIDATED_CONFIGS = {}
+
+# Pyarrow types of the schema entries given as a single string
+_PA_TYPE_MAP = {
+    'object': pa.string(),
+    'int8': pa.int8(),
+    'int16': pa.int32(),
+    'int32': pa.int32(),
+    'int64': pa.int64(),
+    'float32': pa.float32(),
+    'float64': pa.float64(),
+    # Written as Parquet dictionary pages
+    'category': pa.dictionary(pa.int32(), pa.string())
+}
+
+# CSV parse error raised for a float (e.g. '1.0') in an integer column
+_INT_CONVERSION_ERROR = re.compile(
+    r"In CSV column #(\d+): CSV conversion error to u?int\d+: "
+    r"invalid value '[-+]?(?:\d+\.\d*|\.\d+|\d+(?=[eE]))"
+    r"(?:[eE][-+]?\d+)?'")
+
+# Schema entries that format_cols applies with DataFrame.astype
+_ASTYPE_DTYPES = frozenset([
+    'int8', 'int16', 'int32', 'int64', 'float16', 'float32', 'float64',
+    'category'])
+
+
+def _nullable_int_type(subtype):
+    """
+    Look up the Pyarrow type of an ['Int64', subtype] schema entry
+
+    :param subtype:     The intended Pandas integer datatype (e.g. 'int32')
+    :type subtype:      str
+
+    :returns:           A pyarrow.DataType instance, or None if subtype is
+                        not an integer type
+    """
+    pa_type = _PA_TYPE_MAP.get(subtype)
+    return pa_type if pa_type and pa.types.is_integer(pa_type) else None
+
+
+def _config_key(config):
+    """
+    Digest the contents of a config; key order is kept (the order of schema
+    determines the output column order) and each container is tagged with its
+    type so that e.g. a dict and a list of pairs do not collide
+
+    :param config:  Refer to input config structure documentation
+    :type config:   dict
+
+    :returns:       A bytes digest
+    """
+    def canonicalize(obj):
+        if isinstance(obj, dict):
+            return (type(obj).__name__,
+                    tuple((key, canonicalize(val))
+                          for key, val in obj.items()))
+        if isinstance(obj, (list, tuple)):
+            return (type(obj).__name__,
+                    tuple(canonicalize(val) for val in obj))
+        return obj
+    return hashlib.blake2b(repr(canonicalize(config)).encode()).digest()
+
+
+def _pad_short_last_line(buf, num_fields, tail_size=2 ** 16):
+    """
+    Append empty fields in-place to the last line of a buffer if that line
+    has fewer than num_fields comma-delimited fields; only the end of the
+    buffer is inspected
+
+    :param buf:         The contents of a CSV file
+    :type buf:          io.BytesIO
+    :param num_fields:  Expected number of fields per line
+    :type num_fields:   int
+    :param tail_size:   Number of bytes at the end of buf to search for the
+                        last line before searching all of buf
+    :type tail_size:    int
+
+    :returns:           True if the last line was padded
+    """
+    size = buf.getbuffer().nbytes
+    tail_start = max(0, size - tail_size)
+    while True:
+        with buf.getbuffer() as view:
+            tail = bytes(view[tail_start:])
+        end = len(tail.rstrip(b'\r\n'))
+        line_start = tail.rfind(b'\n', 0, end) + 1
+        if line_start or not tail_start:
+            break
+        tail_start = 0
+    last_line = tail[line_start:end]
+    if not last_line or last_line.count(b',') >= num_fields - 1:
+        return False
+    buf.seek(tail_start + end)
+    buf.truncate()
+    buf.write(b',' * (num_fields - 1 - last_line.count(b',')) + b'\n')
+    return True
+
+
+def _drop_lines(buf, rownums):
+    """
+    Remove lines from a buffer; only the lines up to the last removed one are
+    scanned, and the rest of the buffer is copied in one piece
+
+    :param buf:     The contents of a text file
+    :type buf:      io.BytesIO
+    :param rownums: Sorted, unique line numbers to remove
+    :type rownums:  list
+
+    :returns:       An io.BytesIO instance
+    """
+    data = buf.getvalue()
+    view = memoryview(data)
+    pieces, keep_from, pos, line = [], 0, 0, 0
+    for rownum in rownums:
+        while line < rownum and pos < len(data):
+            pos = data.find(b'\n', pos) + 1 or len(data)
+            line += 1
+        if pos >= len(data):
+            break
+        end = data.find(b'\n', pos) + 1 or len(data)
+        pieces.append(view[keep_from:pos])
+        keep_from = pos = end
+        line += 1
+    pieces.append(view[keep_from:])
+    return io.BytesIO(b''.join(pieces))
+
 
 class EngineConfig:
     """
@@ -32,6 +168,19 @@ class EngineConfig:
     :attribute mem_cap:             Threshold in bytes; a portion of
                                     main_df is written
                                     if the threshold is exceeded
+    :attribute ftp_concurrency:     Number of files downloaded in parallel,
+                                    each over its own FTP session
+    :attribute parquet_compression: Codec used to compress Parquet files
+    :attribute parquet_compression_level:
+                                    Level passed to the compression codec
+    :attribute _dir_re:             dir_ptrn compiled to a re.Pattern
+    :attribute _file_re:            file_ptrn compiled to a re.Pattern
+    :attribute _abbr_re:            file_ptrn_abbr compiled to a re.Pattern
+    :property pa_schema:            The schema as a pyarrow.Schema instance;
+                                    generated on first access
+    :property pa_type_map:          A dict; the Pyarrow type each column is
+                                    parsed as when reading a file, in file
+                                    order
     :method _validate:              Performs internal integrity checks on the
                                     input configuration parameters
     :method _validate_schema:       Performs internal integrity checks on the
@@ -51,16 +200,53 @@ class EngineConfig:
     def __init__(self, config):
         """
         Initialize a logging instance, store the contents of the passed config
-        in class attributes, then validate the attribute contents
+        in class attributes, then validate the attribute contents; validation
+        is skipped if a config with identical contents was validated before
 
         :param config:  Refer to input config structure documentation
         :type config:   dict
         """
         self.type_check(config, dict, 'config')
+        self.ftp_concurrency = 8
+        self.parquet_compression = 'zstd'
+        self.parquet_compression_level = None
         for param, value in config.items():
             setattr(self, param, value)
         self.mem_cap = 2 * 10 ** 9
-        self._validate()
+        key = _config_key(config)
+        if key not in _VALIDATED_CONFIGS:
+            self._validate()
+            _VALIDATED_CONFIGS[key] = {
+                '_dir_re': self._dir_re,
+                '_file_re': self._file_re,
+                '_abbr_re': self._abbr_re
+            }
+        self._derived = _VALIDATED_CONFIGS[key]
+        for attr in ['_dir_re', '_file_re', '_abbr_re']:
+            setattr(self, attr, self._derived[attr])
+
+    @property
+    def pa_schema(self):
+        """The schema converted by FTPETLEngine.gen_pa_schema"""
+        if '_pa_schema' not in self._derived:
+            self._derived['_pa_schema'] = FTPETLEngine.gen_pa_schema(
+                self.schema)
+        return self._derived['_pa_schema']
+
+    @property
+    def pa_type_map(self):
+        """
+        The types of pa_schema, except that datetime columns are parsed as
+        strings (format_table applies their format strings)
+        """
+        if '_pa_type_map' not in self._derived:
+            pa_schema = self.pa_schema
+            self._derived['_pa_type_map'] = {
+                col: (pa.string()
+                      if pa.types.is_timestamp(pa_schema.field(col).type)
+                      else pa_schema.field(col).type)
+                for col in self.columns}
+        return self._derived['_pa_type_map']
 
     def _validate(self):
         """Check that the input config has the correct structure"""
@@ -79,6 +265,9 @@ class EngineConfig:
         for req_param, req_type in config_reqs.items():
             self.key_check(req_param, self.__dict__, 'config')
             self.type_check(getattr(self, req_param), req_type, f"{req_param}")
+        self._dir_re = re.compile(self.dir_ptrn)
+        self._file_re = re.compile(self.file_ptrn)
+        self._abbr_re = re.compile(self.file_ptrn_abbr)
 
         logger.info('Validating schema parameters')
         self._validate_schema()
@@ -93,6 +282,37 @@ class EngineConfig:
             logger.info('Validating partition parameters')
             self._validate_partition()
 
+        # bool is a subclass of int, but True is not a thread count
+        if isinstance(self.ftp_concurrency, bool):
+            raise TypeError(
+                f"config: ftp_concurrency must be a {repr(int)}")
+        self.type_check(self.ftp_concurrency, int, 'ftp_concurrency')
+        if self.ftp_concurrency < 1:
+            raise ValueError("config: ftp_concurrency must be at least 1")
+        self.type_check(
+            self.parquet_compression, str, 'parquet_compression')
+        if self.parquet_compression not in ['snappy', 'zstd', 'gzip', 'lz4']:
+            raise ValueError("config: parquet_compression must be one of "
+                             "['snappy', 'zstd', 'gzip', 'lz4']")
+        if self.parquet_compression_level is not None:
+            if isinstance(self.parquet_compression_level, bool):
+                raise TypeError(f"config: parquet_compression_level must be "
+                                f"a {repr(int)}")
+            self.type_check(self.parquet_compression_level, int,
+                            'parquet_compression_level')
+            codec = self.parquet_compression
+            if not pa.Codec.supports_compression_level(codec):
+                raise ValueError(
+                    f"config: parquet_compression_level can't be set for "
+                    f"{codec}")
+            level_range = (pa.Codec.minimum_compression_level(codec),
+                           pa.Codec.maximum_compression_level(codec))
+            if not (level_range[0] <= self.parquet_compression_level
+                    <= level_range[1]):
+                raise ValueError(
+                    f"config: parquet_compression_level must be in "
+                    f"{list(level_range)} for {codec}")
+
         if self.mem_cap < 5 * 10 ** 8:
             logger.warning(
                 'mem_cap is %i; a minimum size of 5 * 10 ** 8 is recommended',
@@ -136,7 +356,7 @@ class EngineConfig:
         self.type_check(self.row_skip, config_reqs['parent'], 'row_skip')
         for file, params in self.row_skip.items():
             self.re_check(
-                file, self.file_ptrn_abbr, f"row_skip key \'{file}\'")
+                file, self._abbr_re, f"row_skip key \'{file}\'")
             for req_param in config_reqs['req_params']:
                 self.key_check(req_param, params, f"row_skip[{file}]")
                 self.type_check(
@@ -227,12 +447,13 @@ class EngineConfig:
         :param obj:         A string
         :type obj:          str
         :param ptrn:        A regular expression
-        :type ptrn:         str
+        :type ptrn:         (str, re.Pattern)
         :param obj_name:    Name of the offending object to print when raising
                             an error
         :raises ValueError: Raises error if the check fails
         """
         if not re.match(ptrn, obj):
+            ptrn = getattr(ptrn, 'pattern', ptrn)
             raise ValueError(
                 f"config: {obj_name} doesn't match pattern {ptrn}")
 
@@ -259,28 +480,32 @@ class EngineConfig:
                 raise ValueError(
                     f"config: {name_obj1}, {name_obj2} have unequal lengths")
         elif mode == 'val':
-            col_match = set(obj1).intersection(obj2)
-            for obj in [obj1, obj2]:
-                if len(col_match) != len(obj):
-                    raise ValueError(f"config: {name_obj1}, {name_obj2} do "
-                                     "not have matching values")
+            # Also rejects duplicates, which a set comparison alone ignores
+            set1, set2 = set(obj1), set(obj2)
+            if (set1 != set2 or len(set1) != len(obj1)
+                    or len(set2) != len(obj2)):
+                raise ValueError(f"config: {name_obj1}, {name_obj2} do "
+                                 "not have matching values")
 
 
 class FTPETLEngine:
     """
     Houses methods needed to import files from an FTP server and write them
-    using an input schema to an S3 bucket as Snappy-compressed Parquet files
+    using an input schema to an S3 bucket as compressed Parquet files
 
     :attribute config:              An EngineConfig instance;
                                     converted from the input dictionary when
                                     initializing this class
     :attribute part_mode:           A string; value is determined by
                                     config.partition
-    :attribute df_main:             A pandas.DataFrame instance; initially
-                                    empty, accumulates the contents of the
-                                    imported files
-    :attribute mem:                 An integer; tracks the size of
-                                    df_main in memory
+    :attribute _tables:             A list of pyarrow.Table instances;
+                                    initially empty, accumulates the contents
+                                    of the imported files
+    :attribute _part_vals:          A list; the partition values present in
+                                    _tables, in import order
+    :attribute mem:                 An integer; running estimate of the
+                                    size of _tables in memory, from the
+                                    nbytes of each table added or written
     :attribute counter:             An integer; initially 0, increments if
                                     filenames
                                     will be duplicated when writing data
@@ -289,13 +514,19 @@ class FTPETLEngine:
     :attribute s3fs_inst:           An s3fs.S3FileSystem instance
     :method etl:                    ETL workhorse method
     :method connect_s3:             Sets s3fs_inst
-    :method import_file:            Appends file contents to df_main
-    :method chunk_write:            Write a portion of df_main contents
-                                    to a Snappy-compressed Parquet file
+    :method _fetch_files:           Reads files on a pool of threads
+    :method import_file:            Appends file contents to _tables
+    :method read_file:              Downloads and formats file contents
+    :method _add_table:             Appends formatted file contents
+    :method chunk_write:            Write a portion of _tables contents
+                                    to a compressed Parquet file
+    :staticmethod download:         Downloads a file into memory
+    :staticmethod read_csv:         Parses a file into a Pyarrow table
     :staticmethod gen_pa_schema:    Makes the input schema Pyarrow-compatible
+    :staticmethod format_table:     Applies a schema to a Pyarrow table
     :staticmethod format_cols:      Applies a schema to a Pandas dataframe
-    :staticmethod write_parquet:    Writes a Pandas dataframe to a
-                                    Snappy-compressed Parquet file
+    :staticmethod write_parquet:    Writes a Pyarrow table to a
+                                    compressed Parquet file
     """
     def __init__(self, config):
         """
@@ -309,7 +540,8 @@ class FTPETLEngine:
             self.part_mode = 'date' if self.config.partition[2] else 'other'
         else:
             self.part_mode = None
-        self.df_main = pd.DataFrame()
+        self._tables = []
+        self._part_vals = []
         self.mem = 0
         self.counter = 0
         self.rows = 0
@@ -318,9 +550,9 @@ class FTPETLEngine:
     def etl(self):
         """
         Connect to the FTP server and import each file by appending its
-        contents to df_main, then write a portion of the accumulated data
-        to the S3 instance when either multiple partitions are present or the
-        data exceeds the allowed memory capacity
+        contents to _tables, then write a portion of the accumulated data to
+        the S3 instance when either multiple partitions
+        are present or the data exceeds the allowed memory capacity
         """
         if not self.s3fs_inst:
             raise ValueError("An s3fs instance has not been initialized, call "
@@ -328,38 +560,39 @@ class FTPETLEngine:
                              "credentials file to rectify")
 
         oversize_flag, head, tail = 0, '', ''
-        pa_schema = self.gen_pa_schema(self.config.schema)
+        pa_schema = self.config.pa_schema
 
         logger.info('Scanning FTP server for matching files')
         with ftplib.FTP(self.config.ip_addr) as ftp:
             ftp.login()
-            files = FTPWalk(ftp).get_files(self.config.dir_ptrn,
-                                           self.config.file_ptrn)
-        for file in files:
-            logger.info(
-                "Importing \'%s\'. Current memory usage: %i MB",
-                file, round(self.mem / 1000000, 1))
-            self.import_file(file)
-            logger.info(
-                "Imported \'%s\' successfully. Current memory usage: %i MB",
-                file, round(self.mem / 1000000, 1))
+            files = FTPWalk(ftp).get_files(self.config._dir_re,
+                                           self.config._file_re)
+        for file, file_abbr, table_read in self._fetch_files(files):
+            self._add_table(table_read)
+            del table_read
+            if logger.isEnabledFor(logging.INFO):
+                mem_mb = round(self.mem / 1000000, 1)
+                logger.info(
+                    "Imported \'%s\' successfully. Current memory usage: "
+                    "%i MB", file, mem_mb)
             if self.part_mode:
-                # Multiple partition values in partition column
-                val_unique = self.df_main['partition'].unique()
-                while len(val_unique) > 1:
+                # Multiple partition values in partition column; every
+                # partition but the most recent one is complete. chunk_write
+                # removes each written value from _part_vals, so iterate
+                # over a copy
+                for part_val in self._part_vals[:-1]:
                     logger.info(
                         "> 1 partition value present, writing partition %s",
-                        val_unique[0])
+                        part_val)
                     # Siphon off a partition and write it
                     self.chunk_write(
                         'multipart', 'leaveRem', pa_schema,
-                        part_val=val_unique[0])
-                    val_unique = val_unique[1:]
+                        part_val=part_val)
             else:
                 # Assign values to head and tail variables for use in filenames
                 if not head:
-                    head = re.search(self.config.file_ptrn_abbr, file)[0]
-                tail = re.search(self.config.file_ptrn_abbr, file)[0]
+                    head = file_abbr
+                tail = file_abbr
             # Allowable memory capacity exceeded
             if self.mem > self.config.mem_cap:
                 oversize_flag = 1
@@ -367,85 +600,206 @@ class FTPETLEngine:
                 if self.part_mode:
                     self.chunk_write(
                         'oversize', 'leaveRem', pa_schema,
-                        part_val=val_unique[0])
+                        part_val=self._part_vals[0])
                 else:
                     self.chunk_write(
                         'oversize', 'leaveRem', pa_schema, head=head,
                         tail=tail)
                     head = tail
         if self.part_mode:
-            self.chunk_write(
-                'residue', 'writeAll', pa_schema, part_val=val_unique[0])
+            if self._part_vals:
+                self.chunk_write('residue', 'writeAll', pa_schema,
+                                 part_val=self._part_vals[0])
         elif oversize_flag:
             self.chunk_write(
                 'residue', 'writeAll', pa_schema, head=head, tail=tail)
         else:
             self.chunk_write('residue', 'writeAll', pa_schema)
-        gc.collect()
         logger.info("ETL complete, %i rows were exported", self.rows)
 
-    def connect_s3(self, path='~/.aws/.credentials', use_ssl=False):
+    def connect_s3(self, path='~/.aws/.credentials', use_ssl=False,
+                   block_size=64 * 2 ** 20, max_pool_connections=64):
         """
         Create a connection to the S3 buckets available to an AWS account
 
-        :param path:    Path to AWS credentials file
-        :type path:     str
+        :param path:                    Path to AWS credentials file
+        :type path:                     str
+        :param block_size:              Size in bytes of each part of a
+                                        multipart upload
+        :type block_size:               int
+        :param max_pool_connections:    Size of the connection pool shared by
+                                        S3 requests
+        :type max_pool_connections:     int
         """
         env_var = 'AWS_SHARED_CREDENTIALS_FILE'
         os.environ[env_var] = str(Path(path).expanduser())
-        self.s3fs_inst = s3fs.S3FileSystem(use_ssl=use_ssl)
+        self.s3fs_inst = s3fs.S3FileSystem(
+            use_ssl=use_ssl, default_block_size=block_size,
+            config_kwargs={'max_pool_connections': max_pool_connections})
+
+    def _fetch_files(self, files):
+        """
+        Download and parse files on a pool of config.ftp_concurrency threads,
+        each of which holds its own FTP session; at most twice that many
+        files are held in memory ahead of the consumer. A session dropped by
+        the server (e.g. an idle timeout while chunks are written) is
+        reopened and the file is downloaded once more
+
+        :param files:   Files on an FTP server to import, in import order
+        :type files:    list
 
-    def import_file(self, file):
+        :returns:       A generator of (file, file_abbr, pyarrow.Table)
+                        tuples in the order of files, where file_abbr is the
+                        match of config.file_ptrn_abbr in file
         """
-        Read the passed filename and append the contents to df_main
+        local, sessions = threading.local(), []
 
-        :param file:   File on an FTP server to import
-        :type file:    str
+        def connect():
+            local.ftp = ftplib.FTP(self.config.ip_addr)
+            sessions.append(local.ftp)
+            local.ftp.login()
+
+        def fetch(file, file_abbr):
+            if not hasattr(local, 'ftp'):
+                connect()
+            try:
+                return self.read_file(file, local.ftp, file_abbr)
+            except (ftplib.error_temp, EOFError, ConnectionError,
+                    TimeoutError) as err:
+                logger.warning("FTP session lost (%r), reconnecting to "
+                               "retry \'%s\'", err, file)
+                local.ftp.close()
+                connect()
+                return self.read_file(file, local.ftp, file_abbr)
+
+        window = 2 * self.config.ftp_concurrency
+        try:
+            with ThreadPoolExecutor(self.config.ftp_concurrency) as pool:
+                futures = deque()
+                for file in files:
+                    logger.info("Queued \'%s\' for import", file)
+                    file_abbr = self.config._abbr_re.search(file)[0]
+                    futures.append((file, file_abbr,
+                                    pool.submit(fetch, file, file_abbr)))
+                    if len(futures) >= window:
+                        file_done, abbr_done, future = futures.popleft()
+                        yield file_done, abbr_done, future.result()
+                while futures:
+                    file_done, abbr_done, future = futures.popleft()
+                    yield file_done, abbr_done, future.result()
+        finally:
+            for ftp in sessions:
+                ftp.close()
+
+    def import_file(self, file, ftp=None, file_abbr=None):
+        """
+        Read the passed filename and append the contents to _tables
+
+        :param file:        File on an FTP server to import
+        :type file:         str
+        :param ftp:         A logged-in FTP session to download over; a new
+                            session is opened if none is passed
+        :type ftp:          ftplib.FTP
+        :param file_abbr:   The match of config.file_ptrn_abbr in file;
+                            searched for if not passed
+        :type file_abbr:    str
+        """
+        self._add_table(self.read_file(file, ftp, file_abbr))
+
+    def read_file(self, file, ftp=None, file_abbr=None):
+        """
+        Download the passed filename and format its contents according to the
+        input config; safe to call from multiple threads
+
+        :param file:        File on an FTP server to read
+        :type file:         str
+        :param ftp:         A logged-in FTP session to download over; a new
+                            session is opened if none is passed
+        :type ftp:          ftplib.FTP
+        :param file_abbr:   The match of config.file_ptrn_abbr in file;
+                            searched for if not passed
+        :type file_abbr:    str
+
+        :returns:           A pyarrow.Table instance
         """
         # Read file, skipping rows if needed
         rownums = []
-        file_abbr = re.search(self.config.file_ptrn_abbr, file)[0]
+        if file_abbr is None:
+            file_abbr = self.config._abbr_re.search(file)[0]
         if hasattr(self.config, 'row_skip'):
             row_skip = self.config.row_skip
             if file_abbr in row_skip:
                 rownums = row_skip[file_abbr]['rownums']
                 rowrepls = row_skip[file_abbr]['rowrepls']
-        df_read = pd.read_csv(f"ftp://{self.config.ip_addr}{file}",
-                              header=None, skiprows=rownums)
-        df_read.drop(df_read.columns[[-1]], axis=1, inplace=True)
+        buf = self.download(file, ftp, self.config.ip_addr)
+        # A truncated last row (error) would fail the parse, so pad it with
+        # empty fields and leave it to the null check below
+        _pad_short_last_line(buf, len(self.config.columns) + 1)
+        table_read = self.format_table(
+            self.read_csv(buf, self.config.columns, self.config.pa_type_map,
+                          rownums),
+            self.config.pa_schema, self.config.schema)
+        del buf
         # If last row is mostly empty (error), remove it
-        if df_read.tail(1).isnull().sum().sum() > 2:
-            df_read.drop(df_read.tail(1).index, inplace=True)
-        # Apply schema
-        df_read.columns = self.config.columns
-        self.format_cols(df_read, self.config.schema)
-        # Insert replacement rows
-        if hasattr(self.config, 'row_skip'):
-            for i, rownum in enumerate(rownums):
-                row = pd.DataFrame(np.array([rowrepls[i]]))
-                row.columns = self.config.columns
-                self.format_cols(row, self.config.schema)
-                df_read = df_read[:rownum] \
-                    .append([row, df_read[rownum:]]) \
-                    .reset_index(drop=True)
-        self.mem += df_read.memory_usage(deep=True).sum()
+        if table_read.num_rows and sum(
+                col.null_count for col in
+                table_read.slice(table_read.num_rows - 1).columns) > 2:
+            table_read = table_read.slice(0, table_read.num_rows - 1)
+        # Insert replacement rows; each replacement lands at its original
+        # row number, so the read rows before it are offset by the number of
+        # replacements already placed
+        if rownums:
+            order = sorted(range(len(rownums)), key=rownums.__getitem__)
+            # Replacements are written as CSV lines and parsed like the file
+            # itself, so every value is typed by the same rules
+            reps_text = io.StringIO()
+            csv.writer(reps_text, lineterminator='\n').writerows(
+                [*rowrepls[i], ''] for i in order)
+            reps = self.format_table(
+                self.read_csv(io.BytesIO(reps_text.getvalue().encode()),
+                              self.config.columns, self.config.pa_type_map),
+                self.config.pa_schema, self.config.schema)
+            segments, start = [], 0
+            for i, rownum in enumerate(sorted(rownums)):
+                stop = rownum - i
+                segments.extend([table_read.slice(start, stop - start),
+                                 reps.slice(i, 1)])
+                start = stop
+            segments.append(table_read.slice(start))
+            table_read = pa.concat_tables(segments)
         # Create column based on partition name
         if self.part_mode:
             part_col = self.config.partition[1]
             if self.part_mode == 'date':
                 part_format = self.config.partition[2]
-                df_read['partition'] = df_read[part_col].map(
-                    lambda x: x.strftime(part_format))
+                part_arr = pc.strftime(
+                    table_read.column(part_col), format=part_format)
             elif self.part_mode == 'other':
-                df_read['partition'] = df_read[part_col]
-        self.df_main = self.df_main.append(
-            df_read, ignore_index=True, sort=False)
-        del df_read
+                part_arr = table_read.column(part_col)
+                if pa.types.is_dictionary(part_arr.type):
+                    # Partition values are compared as plain values
+                    part_arr = part_arr.cast(part_arr.type.value_type)
+            table_read = table_read.append_column('partition', part_arr)
+        return table_read
+
+    def _add_table(self, table_read):
+        """
+        Append a table returned by read_file to _tables
+
+        :param table_read:  Formatted contents of an imported file
+        :type table_read:   pyarrow.Table
+        """
+        self.mem += table_read.nbytes
+        if self.part_mode:
+            for val in table_read.column('partition').unique().to_pylist():
+                if val not in self._part_vals:
+                    self._part_vals.append(val)
+        self._tables.append(table_read)
 
     def chunk_write(self, _source, _mode, _pa_schema, **kwargs):
         """
         Extract a chunk of required size and write it to an S3 bucket as a
-        Snappy-compressed Parquet file
+        compressed Parquet file
 
         :param _source:     One of ['oversize', 'multipart', 'residue'], passed
                             from etl
@@ -454,8 +808,8 @@ class FTPETLEngine:
         :type _mode:        str
         :param _pa_schema:  Output from gen_pa_schema, passed from etl
         :type _pa_schema:   pyarrow.Schema
-        :key head:          A str; first source file contained in df_main
-        :key tail:          A str; last source file contained in df_main
+        :key head:          A str; first source file contained in _tables
+        :key tail:          A str; last source file contained in _tables
         :key part_val:      A str; the partition name to write
         """
         # Check that _source and _mode have valid values
@@ -464,10 +818,18 @@ class FTPETLEngine:
         if _mode not in ['writeAll', 'leaveRem']:
             raise ValueError('Invalid mode for method chunk_write')
 
+        if not self._tables:
+            return
         s3_bucket = self.config.s3_bucket
         table_name = self.config.table_name
+        compression = self.config.parquet_compression
+        # Snappy files keep their original keys so that re-exports overwrite
+        # them; other codecs share a codec-independent extension
+        ext = '.parquet.snappy' if compression == 'snappy' else '.parquet'
+        # Zero-copy; the result references the chunks of each table
+        table_main = pa.concat_tables(self._tables)
 
-        while self.mem > self.config.mem_cap:
+        while True:
             # Construct filenames to export
             if self.part_mode:
                 part_name = self.config.partition[0]
@@ -475,49 +837,150 @@ class FTPETLEngine:
                     f"s3://{s3_bucket}/{table_name}/"
                     f"{part_name}={kwargs['part_val']}/"
                     f"{table_name}_{part_name}={kwargs['part_val']}_"
-                    f"{str(self.counter).zfill(2)}.parquet.snappy")
+                    f"{str(self.counter).zfill(2)}{ext}")
             elif 'head' in kwargs and 'tail' in kwargs:
                 filename = (
                     f"s3://{s3_bucket}/{table_name}/"
                     f"{table_name}_{kwargs['head']}_{kwargs['tail']}_"
-                    f"{str(self.counter).zfill(2)}.parquet.snappy")
+                    f"{str(self.counter).zfill(2)}{ext}")
             else:
                 filename = (
-                    f"s3://{s3_bucket}/{table_name}.parquet.snappy")
-            nrows = int(self.config.mem_cap / self.mem * self.df_main.shape[0])
+                    f"s3://{s3_bucket}/{table_name}{ext}")
 
             if _mode == 'leaveRem':
-                # Siphon off the data that won't be written based on _source,
-                # write the desired data, then reassign the remaining data to
-                # self.df_main
+                # Split off the data that won't be written based on _source,
+                # write the desired data, then keep the remaining data
                 if _source == 'oversize':
-                    df_rem = self.df_main[nrows:]
+                    nrows = int(self.config.mem_cap / self.mem *
+                                table_main.num_rows)
+                    table_write = table_main.slice(0, nrows)
+                    table_rem = table_main.slice(nrows)
                 elif _source == 'multipart':
-                    df_rem = self.df_main[
-                        self.df_main['partition'] != kwargs['part_val']]
-                self.df_main.drop(df_rem.index, inplace=True)
-                df_rem.reset_index(drop=True, inplace=True)
-                if self.part_mode:
-                    self.df_main.drop('partition', axis=1, inplace=True)
+                    # A null comparison would drop the row from both sides
+                    mask = pc.fill_null(pc.equal(
+                        table_main.column('partition'), kwargs['part_val']),
+                        False)
+                    table_write = table_main.filter(mask)
+                    table_rem = table_main.filter(pc.invert(mask))
                 self.write_parquet(
-                    self.df_main, _pa_schema, filename, self.s3fs_inst)
-                self.rows += self.df_main.shape[0]
+                    table_write, _pa_schema, filename, self.s3fs_inst,
+                    compression,
+                    self.config.parquet_compression_level)
+                self.rows += table_write.num_rows
                 logger.info("Wrote %s", filename)
-                self.mem = df_rem.memory_usage(deep=True).sum()
-                self.df_main = df_rem
+                # Running estimate; nbytes only sums buffer ranges per chunk,
+                # so this never rescans the remaining rows
+                self.mem = max(self.mem - table_write.nbytes, 0)
+                table_main = table_rem
+                # Release the written data before the next chunk is split off
+                del table_write, table_rem
                 if _source == 'oversize':
                     self.counter += 1
                 if _source == 'multipart' or not self.part_mode:
                     self.counter = 0
+                if _source == 'multipart':
+                    self._part_vals.remove(kwargs['part_val'])
             if _mode == 'writeAll':
-                # Write the entire contents of self.df_main
+                # Write the entire contents of table_main
                 self.write_parquet(
-                    self.df_main, _pa_schema, filename, self.s3fs_inst)
-                self.rows += self.df_main.shape[0]
+                    table_main, _pa_schema, filename, self.s3fs_inst,
+                    compression,
+                    self.config.parquet_compression_level)
+                self.rows += table_main.num_rows
                 logger.info("Wrote %s", filename)
-                self.df_main = pd.DataFrame()
+                table_main = table_main.slice(0, 0)
+                self.mem = 0
+                self._part_vals = []
                 self.counter = 0
-            gc.collect()
+            # Only oversize chunks are split over multiple files
+            if _source != 'oversize' or self.mem <= self.config.mem_cap:
+                break
+        self._tables = [table_main] if table_main.num_rows else []
+
+    @staticmethod
+    def download(file, ftp, ip_addr):
+        """
+        Download a file from an FTP server into memory
+
+        :param file:    File on an FTP server to download
+        :type file:     str
+        :param ftp:     A logged-in FTP session; if None, a session is opened
+                        and closed around the download
+        :type ftp:      ftplib.FTP
+        :param ip_addr: The IP address of the FTP server
+        :type ip_addr:  str
+
+        :returns:       An io.BytesIO instance positioned at the start
+        """
+        buf = io.BytesIO()
+        if ftp is None:
+            with ftplib.FTP(ip_addr) as ftp:
+                ftp.login()
+                ftp.retrbinary(f"RETR {file}", buf.write)
+        else:
+            ftp.retrbinary(f"RETR {file}", buf.write)
+        buf.seek(0)
+        return buf
+
+    @staticmethod
+    def read_csv(buf, columns, column_types, skiprows=()):
+        """
+        Parse a headerless CSV file with Pyarrow; each row is expected to end
+        with a trailing delimiter, and rows with the wrong number of fields
+        raise an error
+
+        :param buf:             The contents of the CSV file
+        :type buf:              io.BytesIO
+        :param columns:         Refer to input config structure documentation
+        :type columns:          (list, tuple)
+        :param column_types:    Pyarrow types to parse each column as
+        :type column_types:     dict
+        :param skiprows:        Line numbers to remove before parsing
+        :type skiprows:         (list, tuple)
+
+        :returns:               A pyarrow.Table instance with columns in
+                                the order of column_types
+        """
+        skip_rows = 0
+        if skiprows:
+            skiprows = sorted(set(skiprows))
+            if skiprows[-1] == len(skiprows) - 1:
+                # Only leading lines are skipped; the parser can do it
+                skip_rows = len(skiprows)
+            else:
+                buf = _drop_lines(buf, skiprows)
+
+        def parse(types):
+            buf.seek(0)
+            return pv.read_csv(
+                buf,
+                read_options=pv.ReadOptions(
+                    skip_rows=skip_rows,
+                    column_names=[*columns, '__trailing__']),
+                convert_options=pv.ConvertOptions(
+                    column_types=types, include_columns=list(column_types),
+                    strings_can_be_null=True))
+
+        # Integer columns holding floats (e.g. '1.0') are re-parsed as
+        # float64 one at a time, so the other columns keep full precision
+        types = dict(column_types)
+        while True:
+            try:
+                table = parse(types)
+                break
+            except pa.ArrowInvalid as err:
+                match = _INT_CONVERSION_ERROR.search(str(err))
+                if not match:
+                    raise
+                col = columns[int(match.group(1))]
+                types[col] = pa.float64()
+        # Truncate the fractions, as astype(float).astype(int) did, but
+        # raise on values outside the integer range
+        for i, (col, col_type) in enumerate(column_types.items()):
+            if types[col] != col_type:
+                table = table.set_column(i, col, pc.cast(
+                    pc.trunc(table.column(col)), col_type))
+        return table
 
     @staticmethod
     def gen_pa_schema(schema):
@@ -531,23 +994,17 @@ class FTPETLEngine:
         """
         pa_schema = []
         for key, val in schema.items():
-            if val == 'object':
-                pa_schema.append(pa.field(key, pa.string()))
-            elif val == 'int8' or (val[0] == 'Int64' and val[1] == 'int8'):
-                pa_schema.append(pa.field(key, pa.int8()))
-            elif val in ['int16', 'int32'] or (val[0] == 'Int64' and
-                                               val[1] in ['int16', 'int32']):
-                pa_schema.append(pa.field(key, pa.int32()))
-            elif val == 'int64' or (val[0] == 'Int64' and val[1] == 'int64'):
-                pa_schema.append(pa.field(key, pa.int64()))
-            elif val == 'float32':
-                pa_schema.append(pa.field(key, pa.float32()))
-            elif val == 'float64':
-                pa_schema.append(pa.field(key, pa.float64()))
+            if isinstance(val, str):
+                pa_type = _PA_TYPE_MAP.get(val)
+            elif val[0] == 'Int64':
+                pa_type = _nullable_int_type(val[1])
             elif val[0] == 'datetime':
-                pa_schema.append(pa.field(key, pa.timestamp('ms')))
+                pa_type = pa.timestamp('ms')
             else:
+                pa_type = None
+            if pa_type is None:
                 raise ValueError('Undefined type')
+            pa_schema.append(pa.field(key, pa_type))
         return pa.schema(pa_schema)
 
     @staticmethod
@@ -562,8 +1019,7 @@ class FTPETLEngine:
         :type schema:   dict
         """
         for col, col_def in schema.items():
-            if col_def in ['int8', 'int16', 'int32', 'int64', 'float16',
-                           'float32', 'float64', 'category']:
+            if isinstance(col_def, str) and col_def in _ASTYPE_DTYPES:
                 try:
                     df[col] = df[col].astype(col_def)
                 except ValueError:
@@ -579,17 +1035,55 @@ class FTPETLEngine:
                 raise ValueError("Undefined type", col_def)
 
     @staticmethod
-    def write_parquet(df, pa_schema, filename, s3fs_inst):
+    def format_table(table, pa_schema, schema):
+        """
+        Convert a Pyarrow table returned by read_csv to the passed schema;
+        datetime columns are parsed using the formatting strings in schema
+
+        :param table:       Pyarrow table to process
+        :type table:        pyarrow.Table
+        :param pa_schema:   Output from gen_pa_schema
+        :type pa_schema:    pyarrow.Schema
+        :param schema:      Refer to input config structure documentation
+        :type schema:       dict
+
+        :returns:           A pyarrow.Table instance matching pa_schema
+        """
+        for col, col_def in schema.items():
+            if not isinstance(col_def, str) and col_def[0] == 'datetime':
+                table = table.set_column(
+                    table.schema.get_field_index(col), col,
+                    pc.strptime(table.column(col), format=col_def[1],
+                                unit='s'))
+        return table.select(pa_schema.names).cast(pa_schema)
+
+    @staticmethod
+    def write_parquet(table, pa_schema, filename, s3fs_inst,
+                      compression='zstd', compression_level=None,
+                      row_group_bytes=64 * 2 ** 20):
         """
-        Use Pyarrow and the passed schema to write a Pandas dataframe to a
-        Snappy-compressed Parquet file
+        Use Pyarrow and the passed schema to stream a Pyarrow table to a
+        compressed Parquet file one row group at a time; columns not in the
+        schema are dropped
 
-        :param df:          Pandas dataframe to write to a Parquet file
-        :type df:           pandas.DataFrame
-        :param filename:    File path to write to in an S3 bucket
-        :type filename:     str
+        :param table:               Pyarrow table to write to a Parquet file
+        :type table:                pyarrow.Table
+        :param filename:            File path to write to in an S3 bucket
+        :type filename:             str
+        :param compression:         Parquet compression codec
+        :type compression:          str
+        :param compression_level:   Codec-specific compression level; None
+                                    uses the codec default
+        :type compression_level:    int
+        :param row_group_bytes:     Approximate in-memory size of each row
+                                    group
+        :type row_group_bytes:      int
         """
-        pq.write_table(
-            pa.Table.from_pandas(
-                df, schema=pa_schema, preserve_index=False),
-            filename, filesystem=s3fs_inst)
+        table = table.select(pa_schema.names)
+        row_group_size = max(
+            1, row_group_bytes * table.num_rows // max(table.nbytes, 1))
+        with s3fs_inst.open(filename, 'wb') as sink, \
+                pq.ParquetWriter(sink, pa_schema, compression=compression,
+                                 compression_level=compression_level,
+                                 use_dictionary=True) as writer:
+            writer.write_table(table, row_group_size=row_group_size)
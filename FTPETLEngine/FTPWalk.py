@@ -1,6 +1,8 @@
 """
 Connects to an FTP server and scans the contents
 """
+from collections import deque
+import ftplib
 import os
 import re
 
@@ -18,6 +20,7 @@ class FTPWalk:
         :type conection:    ftplib.FTP
         """
         self.connection = connection
+        self.use_mlsd = True
 
     def walk(self, path='/'):
         """
@@ -25,23 +28,35 @@ class FTPWalk:
 
         :param path:    Directory in which to create a tree
         """
-        dirs, nondirs = self.listdir(path)
-        yield path, dirs, nondirs
-        for name in dirs:
-            path = os.path.join(path, name)
-            yield from self.walk(path)
-            self.connection.cwd('..')
-            path = os.path.dirname(path)
+        queue = deque([path])
+        while queue:
+            path = queue.popleft()
+            dirs, nondirs = self.listdir(path)
+            yield path, dirs, nondirs
+            queue.extend(os.path.join(path, name) for name in dirs)
 
     def listdir(self, _path):
         """
-        Generates a file-directory tree given a path
+        Generates a file-directory tree given a path; uses MLSD, falling back
+        to parsing LIST output if the server does not support it
 
         :param _path:   Inherited from walk
 
         :returns:       Lists of directory and file names within _path
         """
-        file_list, dirs, nondirs = [], [], []
+        dirs, nondirs = [], []
+        if self.use_mlsd:
+            try:
+                for name, facts in self.connection.mlsd(_path, ['type']):
+                    ls_type = facts.get('type', '').lower()
+                    if ls_type == 'dir':
+                        dirs.append(name)
+                    elif ls_type not in ['cdir', 'pdir']:
+                        nondirs.append(name)
+                return dirs, nondirs
+            except ftplib.error_perm:
+                self.use_mlsd = False
+        file_list = []
         self.connection.cwd(_path)
         self.connection.retrlines(
             'LIST', lambda x: file_list.append(x.split()))
@@ -60,18 +75,19 @@ class FTPWalk:
 
         :param dir_ptrn:    Regular expression identifying directories that
                             contain relevant files
-        :type dir_ptrn:     str
+        :type dir_ptrn:     (str, re.Pattern)
         :param file_ptrn:   Regular expression identifying relevant files
-        :type file_ptrn:    str
+        :type file_ptrn:    (str, re.Pattern)
 
         :returns:           A list of strings, each of which is the full path
                             to a specific file
         """
         files = []
+        dir_ptrn, file_ptrn = re.compile(dir_ptrn), re.compile(file_ptrn)
         for item in self.walk():
-            if re.match(dir_ptrn, item[0]) and item[2]:
+            if dir_ptrn.match(item[0]) and item[2]:
                 for file in item[2]:
-                    if re.match(file_ptrn, file):
+                    if file_ptrn.match(file):
                         files.append(os.path.join(item[0], file))
         files.sort()
         return files
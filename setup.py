@@ -16,7 +16,7 @@ setup(
         "s3fs"
     ],
     description='Performs the ETL process on files on an FTP server to '
-                'Snappy-compressed parquet files in an S3 bucket',
+                'compressed parquet files in an S3 bucket',
     long_description=long_description,
     project_urls={
         'Source Code': ("https://console.aws.amazon.com/codesuite/"